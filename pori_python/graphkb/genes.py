@@ -532,7 +532,7 @@ def get_gene_information(
         flagged = False
         for flag in gene_flags:
             # make smaller JSON to upload since all default to false already
-            if equivalent.intersection(gene_flags[flag]):
+            if not equivalent.isdisjoint(gene_flags[flag]):
                 row[flag] = flagged = True
         if flagged:
             result.append(cast(IprGene, row))
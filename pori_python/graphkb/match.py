@@ -2,6 +2,8 @@
 Functions which return Variants from GraphKB which match some input variant definition
 """
 
+from __future__ import annotations
+
 from typing import Dict, List, Optional, Set, Union, cast
 
 from pori_python.types import (
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from typing import List, cast
 
 from pori_python.types import CategoryBaseTermMapping, Statement, Variant
@@ -39,7 +41,11 @@ def get_statements_from_variants(
     statements = graphkb_conn.query(
         {
             "target": "Statement",
-            "filters": {"conditions": convert_to_rid_list(variants), "operator": "CONTAINSANY"},
+            # sorted so that the same variants in any order share a query cache entry
+            "filters": {
+                "conditions": sorted(set(convert_to_rid_list(variants))),
+                "operator": "CONTAINSANY",
+            },
             "returnProperties": STATEMENT_RETURN_PROPERTIES,
         }
     )
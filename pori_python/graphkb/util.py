@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import requests
 from requests.adapters import HTTPAdapter
 
@@ -9,7 +11,6 @@ import re
 import time
 from datetime import datetime
 from typing import Any, Dict, Iterable, List, Optional, Union, cast
-from urllib3.util.retry import Retry
 
 from pori_python.types import ParsedVariant, PositionalVariant, Record
 
@@ -103,14 +104,10 @@ class GraphKBConnection:
         use_global_cache: bool = True,
     ):
         self.http = requests.Session()
-        retries = Retry(
-            total=100,
-            connect=5,
-            status=5,
-            backoff_factor=5,
-            status_forcelist=[429, 500, 502, 503, 504],
-        )
-        self.http.mount("https://", HTTPAdapter(max_retries=retries))
+        # the session is only for connection reuse, request() and login() do their own retries
+        adapter = HTTPAdapter(max_retries=0)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
         self.token = ""
         self.url = url
         self.username = username
@@ -158,9 +155,8 @@ class GraphKBConnection:
             self.first_request = start_time
         self.last_request = start_time
 
-        # using a manual retry as well as using the requests Retry() object because
-        # a ConnectionError or OSError might be thrown and we still want to retry in those cases.
-        # about catching OSError as well as ConnectionError:
+        # retry manually since a ConnectionError or OSError might be thrown and we still
+        # want to retry in those cases. about catching OSError as well as ConnectionError:
         # https://stackoverflow.com/questions/74253820
         attempts = range(15)
         for attempt in attempts:
@@ -169,7 +165,7 @@ class GraphKBConnection:
             try:
                 self.refresh_login()
                 self.request_count += 1
-                resp = requests.request(
+                resp = self.http.request(
                     method, url, headers=self.headers, timeout=timeout, **kwargs
                 )
                 if resp.status_code == 401 or resp.status_code == 403:
@@ -213,14 +209,14 @@ class GraphKBConnection:
         connect_timeout = 7
         read_timeout = 61
 
-        # use requests package directly to avoid recursion loop on login failure
+        # use the session directly to avoid recursion loop on login failure
         attempts = range(10)
         for attempt in attempts:
             if attempt > 0:
                 time.sleep(2)  # wait between retries
             try:
                 self.request_count += 1
-                resp = requests.request(
+                resp = self.http.request(
                     url=f"{self.url}/token",
                     method="POST",
                     headers=self.headers,
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from typing import Callable, Dict, Iterable, List, Set, cast
 
 from pori_python.types import Ontology
@@ -6,9 +6,9 @@ from __future__ import annotations
 
 from requests.exceptions import HTTPError
 
-from pandas import isnull
+import re
 from tqdm import tqdm
-from typing import Dict, List, Sequence, cast
+from typing import Dict, List, Sequence, Set, Tuple, cast
 
 from pori_python.graphkb import GraphKBConnection
 from pori_python.graphkb import match as gkb_match
@@ -30,6 +30,8 @@ from .ipr import convert_statements_to_alterations
 from .util import convert_to_rid_set, logger
 
 REPORTED_COPY_VARIANTS = (INPUT_COPY_CATEGORIES.AMP, INPUT_COPY_CATEGORIES.DEEP)
+# genomic substitution with a blank alternate, eg. 'chr1:g.150951027T>'
+MALFORMED_DELETION = re.compile(r"g\..*\d[A-Za-z]>$")
 
 
 def get_second_pass_variants(
@@ -39,20 +41,17 @@ def get_second_pass_variants(
     new category variants to be used in a second-pass matching.
     """
     # second-pass matching
-    all_inferred_matches: Dict[str, Variant] = {}
     inferred_variants = {
         (s["subject"]["@rid"], s["relevance"]["name"])
         for s in statements
         if s["subject"] and s["subject"]["@class"] in ("Feature", "Signature")
     }
-
-    for reference1, variant_type in inferred_variants:
-        variants = gkb_match.match_category_variant(graphkb_conn, reference1, variant_type)
-
-        for variant in variants:
-            all_inferred_matches[variant["@rid"]] = variant
-    inferred_matches: List[Variant] = list(all_inferred_matches.values())
-    return inferred_matches
+    all_inferred_matches: Dict[str, Variant] = {
+        variant["@rid"]: variant
+        for reference1, variant_type in inferred_variants
+        for variant in gkb_match.match_category_variant(graphkb_conn, reference1, variant_type)
+    }
+    return list(all_inferred_matches.values())
 
 
 def get_ipr_statements_from_variants(
@@ -65,17 +64,17 @@ def get_ipr_statements_from_variants(
     """
     if not matches:
         return []
-    rows = []
     statements = get_statements_from_variants(graphkb_conn, matches)
     existing_statements = {s["@rid"] for s in statements}
 
-    for ipr_row in convert_statements_to_alterations(
+    rows = convert_statements_to_alterations(
         graphkb_conn, statements, disease_name, convert_to_rid_set(matches)
-    ):
-        rows.append(ipr_row)
+    )
 
     # second-pass matching
     inferred_matches = get_second_pass_variants(graphkb_conn, statements)
+    if not inferred_matches:
+        return rows
 
     inferred_statements = [
         s
@@ -110,6 +109,8 @@ def annotate_expression_variants(
     skipped = 0
     alterations = []
     problem_genes = set()
+    # rows for the same gene and category (eg. multiple transcripts) share their matches
+    matched_rows: Dict[Tuple[str, str], List[KbMatch]] = {}
     logger.info(f"Starting annotation of {len(variants)} expression category_variants")
     iterfunc = tqdm if show_progress else iter
     for row in iterfunc(variants):
@@ -118,17 +119,22 @@ def annotate_expression_variants(
 
         if not variant:
             skipped += 1
-            logger.debug(f"Skipping malformed Expression {gene}: {row}")
+            logger.debug("Skipping malformed Expression %s: %s", gene, row)
             continue
         try:
-            matches = gkb_match.match_expression_variant(graphkb_conn, gene, variant)
-            for ipr_row in get_ipr_statements_from_variants(graphkb_conn, matches, disease_name):
+            if (gene, variant) not in matched_rows:
+                matches = gkb_match.match_expression_variant(graphkb_conn, gene, variant)
+                matched_rows[(gene, variant)] = get_ipr_statements_from_variants(
+                    graphkb_conn, matches, disease_name
+                )
+            for ipr_row in matched_rows[(gene, variant)]:
+                ipr_row = cast(KbMatch, dict(ipr_row))
                 ipr_row["variant"] = row["key"]
                 ipr_row["variantType"] = row.get("variantType", "exp")
                 alterations.append(ipr_row)
         except FeatureNotFoundError as err:
             problem_genes.add(gene)
-            logger.debug(f"Unrecognized gene ({gene} {variant}): {err}")
+            logger.debug("Unrecognized gene (%s %s): %s", gene, variant, err)
         except ValueError as err:
             logger.error(f"failed to match variants ({gene} {variant}): {err}")
 
@@ -161,6 +167,8 @@ def annotate_copy_variants(
     skipped = 0
     alterations = []
     problem_genes = set()
+    # rows for the same gene and category (eg. multiple transcripts) share their matches
+    matched_rows: Dict[Tuple[str, str], List[KbMatch]] = {}
 
     logger.info(f"Starting annotation of {len(variants)} copy category_variants")
     iterfunc = tqdm if show_progress else iter
@@ -171,17 +179,24 @@ def annotate_copy_variants(
         if variant not in REPORTED_COPY_VARIANTS:
             # https://www.bcgsc.ca/jira/browse/GERO-77
             skipped += 1
-            logger.debug(f"Dropping {gene} copy change '{variant}' - not in REPORTED_COPY_VARIANTS")
+            logger.debug(
+                "Dropping %s copy change '%s' - not in REPORTED_COPY_VARIANTS", gene, variant
+            )
             continue
         try:
-            matches = gkb_match.match_copy_variant(graphkb_conn, gene, variant)
-            for ipr_row in get_ipr_statements_from_variants(graphkb_conn, matches, disease_name):
+            if (gene, variant) not in matched_rows:
+                matches = gkb_match.match_copy_variant(graphkb_conn, gene, variant)
+                matched_rows[(gene, variant)] = get_ipr_statements_from_variants(
+                    graphkb_conn, matches, disease_name
+                )
+            for ipr_row in matched_rows[(gene, variant)]:
+                ipr_row = cast(KbMatch, dict(ipr_row))
                 ipr_row["variant"] = row["key"]
                 ipr_row["variantType"] = row.get("variantType", "cnv")
                 alterations.append(ipr_row)
         except FeatureNotFoundError as err:
             problem_genes.add(gene)
-            logger.debug(f"Unrecognized gene ({gene} {variant}): {err}")
+            logger.debug("Unrecognized gene (%s %s): %s", gene, variant, err)
         except ValueError as err:
             logger.error(f"failed to match variants ({gene} {variant}): {err}")
 
@@ -219,6 +234,10 @@ def annotate_positional_variants(
     VARIANT_KEYS = ("variant", "hgvsProtein", "hgvsCds", "hgvsGenomic")
     errors = 0
     alterations: List[Hashabledict] = []
+    # the other fields follow from the statement and matched variant for a given disease
+    seen_alterations: Set[Tuple[str, str, str, str]] = set()
+    # the same variant notation (eg. shared by alternate transcripts) is only matched once
+    matched_rows: Dict[str, List[KbMatch]] = {}
     problem_genes = set()
 
     iterfunc = tqdm if show_progress else iter
@@ -231,39 +250,43 @@ def annotate_positional_variants(
         for var_key in VARIANT_KEYS:
             variant = row.get(var_key)
             matches = []
-            if not variant or isnull(variant):
+            if not variant or variant != variant:  # empty or NaN
                 continue
             try:
-                try:
-                    matches = gkb_match.match_positional_variant(graphkb_conn, variant)
-                except HTTPError as parse_err:
-                    # DEVSU-1885 - fix malformed single deletion described as substitution of blank
-                    # eg. deletion described as substitution with nothing: 'chr1:g.150951027T>'
-                    if (
-                        variant[-1] == ">"
-                        and "g." in variant
-                        and variant[-2].isalpha()
-                        and variant[-3].isnumeric()
-                    ):
+                input_variant = variant
+                if input_variant not in matched_rows:
+                    if MALFORMED_DELETION.search(variant):
+                        # DEVSU-1885 - fix malformed single deletion described as substitution of blank
+                        # eg. deletion described as substitution with nothing: 'chr1:g.150951027T>'
+                        # rewritten before matching since the parser would reject it
                         logger.warning(
                             f"Assuming malformed deletion variant {variant} is {variant[:-2] + 'del'}"
                         )
                         variant = variant[:-2] + "del"
-                        matches = gkb_match.match_positional_variant(graphkb_conn, variant)
-                    else:
-                        raise parse_err
+                    matches = gkb_match.match_positional_variant(graphkb_conn, variant)
+                    matched_rows[input_variant] = get_ipr_statements_from_variants(
+                        graphkb_conn, matches, disease_name
+                    )
 
-                for ipr_row in get_ipr_statements_from_variants(
-                    graphkb_conn, matches, disease_name
-                ):
-                    ipr_row["variant"] = row["key"]
-                    ipr_row["variantType"] = row.get(
+                for ipr_row in matched_rows[input_variant]:
+                    alteration = Hashabledict(ipr_row)
+                    alteration["variant"] = row["key"]
+                    alteration["variantType"] = row.get(
                         "variantType", "mut" if row.get("gene") else "sv"
                     )
-                    alterations.append(Hashabledict(ipr_row))
+                    # drop duplicates
+                    alteration_key = (
+                        alteration["kbStatementId"],
+                        alteration["kbVariantId"],
+                        alteration["variant"],
+                        alteration["variantType"],
+                    )
+                    if alteration_key not in seen_alterations:
+                        seen_alterations.add(alteration_key)
+                        alterations.append(alteration)
 
             except FeatureNotFoundError as err:
-                logger.debug(f"failed to match positional variants ({variant}): {err}")
+                logger.debug("failed to match positional variants (%s): %s", variant, err)
                 errors += 1
                 if "gene" in row:
                     problem_genes.add(row["gene"])
@@ -286,9 +309,6 @@ def annotate_positional_variants(
     if errors:
         logger.error(f"skipped {errors} positional variants due to errors")
 
-    # drop duplicates
-    alterations = list(set(alterations))
-
     variant_types = ", ".join(sorted(set([alt["variantType"] for alt in alterations])))
     logger.info(
         f"matched {len(variants)} {variant_types} positional variants to {len(alterations)} graphkb annotations"
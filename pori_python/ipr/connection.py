@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import requests
 
 import json
@@ -7,7 +9,7 @@ import zlib
 from typing import Dict, List
 
 from .constants import DEFAULT_URL
-from .util import logger
+from .util import dumps_json, logger
 
 IMAGE_MAX = 20  # cannot upload more than 20 images at a time
 
@@ -71,7 +73,7 @@ class IprConnection:
         return self.request(
             uri,
             method="POST",
-            data=zlib.compress(json.dumps(data, allow_nan=False).encode("utf-8")),
+            data=zlib.compress(dumps_json(data)),
             **kwargs,
         )
 
@@ -80,7 +82,7 @@ class IprConnection:
         return self.request(
             uri,
             method="GET",
-            data=zlib.compress(json.dumps(data, allow_nan=False).encode("utf-8")),
+            data=zlib.compress(dumps_json(data)),
             **kwargs,
         )
 
@@ -89,7 +91,7 @@ class IprConnection:
         return self.request(
             uri,
             method="DELETE",
-            data=zlib.compress(json.dumps(data, allow_nan=False).encode("utf-8")),
+            data=zlib.compress(dumps_json(data)),
             headers=json.dumps({"Accept": "*/*"}),
             **kwargs,
         )
@@ -171,7 +173,7 @@ class IprConnection:
         return self.request(
             f"/reports/{report_id}/summary/analyst-comments",
             method="PUT",
-            data=zlib.compress(json.dumps(data, allow_nan=False).encode("utf-8")),
+            data=zlib.compress(dumps_json(data)),
         )
 
     def post_images(self, report_id: str, files: Dict[str, str], data: Dict[str, str] = {}) -> None:
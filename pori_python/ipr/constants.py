@@ -1,5 +1,6 @@
 DEFAULT_URL = "https://iprstaging-api.bcgsc.ca/api"
 GERMLINE_BASE_TERMS = ("pharmacogenomic", "cancer predisposition")  # based on graphkb.constants
+_GERMLINE_BASE_TERMS_SET = frozenset(GERMLINE_BASE_TERMS)
 VARIANT_CLASSES = {"Variant", "CategoryVariant", "PositionalVariant", "CatalogueVariant"}
 
 # all possible values for review status are: ['pending', 'not required', 'passed', 'failed', 'initial']
@@ -21,8 +21,8 @@ from pori_python.types import (
     Variant,
 )
 
-from .constants import GERMLINE_BASE_TERMS, VARIANT_CLASSES
-from .util import find_variant, logger
+from .constants import _GERMLINE_BASE_TERMS_SET, GERMLINE_BASE_TERMS, VARIANT_CLASSES
+from .util import build_variant_index, logger
 
 
 def display_evidence_levels(statement: Statement) -> str:
@@ -49,19 +49,14 @@ def filter_structural_variants(
         gene["name"] for gene in gene_annotations if gene.get("knownFusionPartner", False)
     }
 
-    result = []
-
-    for structural_variant in structural_variants:
-        if any(
-            [
-                structural_variant["highQuality"],
-                structural_variant["key"] in matched_svs,
-                structural_variant["gene1"] in fusion_genes,
-                structural_variant["gene2"] in fusion_genes,
-            ]
-        ):
-            result.append(structural_variant)
-    return result
+    return [
+        structural_variant
+        for structural_variant in structural_variants
+        if structural_variant["highQuality"]
+        or structural_variant["key"] in matched_svs
+        or structural_variant["gene1"] in fusion_genes
+        or structural_variant["gene2"] in fusion_genes
+    ]
 
 
 def get_evidencelevel_mapping(graphkb_conn: GraphKBConnection) -> Dict[str, str]:
@@ -279,6 +274,7 @@ def create_key_alterations(
     }
     counts: Dict[str, Set] = {v: set() for v in type_mapping.values()}
     skipped_variant_types = []
+    variant_index = build_variant_index(all_variants)
     for kb_match in kb_matches:
         variant_type = kb_match["variantType"]
         variant_key = kb_match["variant"]
@@ -293,9 +289,9 @@ def create_key_alterations(
                 )
             continue
         try:
-            variant = find_variant(all_variants, variant_type, variant_key)
-        except KeyError as err:
-            logger.error(err)
+            variant = variant_index[(variant_type, variant_key)]
+        except KeyError:
+            logger.error(f"expected variant ({variant_key}, {variant_type}) does not exist")
             logger.error(f"No variant match found for {variant_key}")
             continue
 
@@ -306,7 +302,7 @@ def create_key_alterations(
         elif variant_type == "cnv":
             alterations.append(f'{variant.get("gene","")} ({variant.get("cnvState")})')
         # only show germline if relevant
-        elif kb_match["category"] in GERMLINE_BASE_TERMS and variant.get("germline"):
+        elif kb_match["category"] in _GERMLINE_BASE_TERMS_SET and variant.get("germline"):
             alterations.append(f"germline {variant['variant']}")
         else:
             alterations.append(variant["variant"])
@@ -343,17 +339,29 @@ def germline_kb_matches(
         filtered list of kb_matches
     """
     ret_list = []
-    germ_alts = [alt for alt in kb_matches if alt["category"] in GERMLINE_BASE_TERMS]
-    somatic_alts = [alt for alt in kb_matches if alt not in germ_alts]
+    variants_by_key: Dict[str, List[IprVariant]] = {}
+    for variant in all_variants:
+        variants_by_key.setdefault(variant["key"], []).append(variant)
+
+    germ_alts = []
+    somatic_alts = []
+    for alt in kb_matches:
+        if alt["category"] in _GERMLINE_BASE_TERMS_SET:
+            germ_alts.append(alt)
+        else:
+            somatic_alts.append(alt)
     if germ_alts:
         logger.info(f"checking germline status of {GERMLINE_BASE_TERMS}")
         for alt in germ_alts:
-            var_list = [v for v in all_variants if v["key"] == alt["variant"]]
+            var_list = variants_by_key.get(alt["variant"], [])
             germline_var_list = [v for v in var_list if v.get("germline")]
             unknown_var_list = [v for v in var_list if "germline" not in v]
             if germline_var_list:
                 logger.debug(
-                    f"germline kbStatementId:{alt['kbStatementId']}: {alt['kbVariant']} {alt['category']}"
+                    "germline kbStatementId:%s: %s %s",
+                    alt["kbStatementId"],
+                    alt["kbVariant"],
+                    alt["category"],
                 )
                 ret_list.append(alt)
             elif unknown_var_list:
@@ -362,25 +370,37 @@ def germline_kb_matches(
                 )
                 if not assume_somatic:
                     logger.debug(
-                        f"Keeping unverified match to germline kbStatementId:{alt['kbStatementId']}: {alt['kbVariant']} {alt['category']}"
+                        "Keeping unverified match to germline kbStatementId:%s: %s %s",
+                        alt["kbStatementId"],
+                        alt["kbVariant"],
+                        alt["category"],
                     )
                     ret_list.append(alt)
                 else:
                     logger.debug(
-                        f"Dropping unverified match to germline kbStatementId:{alt['kbStatementId']}: {alt['kbVariant']} {alt['category']}"
+                        "Dropping unverified match to germline kbStatementId:%s: %s %s",
+                        alt["kbStatementId"],
+                        alt["kbVariant"],
+                        alt["category"],
                     )
             else:
                 logger.debug(
-                    f"Dropping somatic match to germline kbStatementId:{alt['kbStatementId']}: {alt['kbVariant']} {alt['category']}"
+                    "Dropping somatic match to germline kbStatementId:%s: %s %s",
+                    alt["kbStatementId"],
+                    alt["kbVariant"],
+                    alt["category"],
                 )
     if somatic_alts:
         # Remove any matches to germline events
         for alt in somatic_alts:
-            var_list = [v for v in all_variants if v["key"] == alt["variant"]]
+            var_list = variants_by_key.get(alt["variant"], [])
             somatic_var_list = [v for v in var_list if not v.get("germline", not assume_somatic)]
             if var_list and not somatic_var_list:
                 logger.debug(
-                    f"Dropping germline match to somatic statement kbStatementId:{alt['kbStatementId']}: {alt['kbVariant']} {alt['category']}"
+                    "Dropping germline match to somatic statement kbStatementId:%s: %s %s",
+                    alt["kbStatementId"],
+                    alt["kbVariant"],
+                    alt["category"],
                 )
             elif somatic_var_list:
                 ret_list.append(alt)  # match to somatic variant
@@ -5,9 +5,11 @@ import datetime
 import json
 import jsonschema.exceptions
 import logging
+import orjson
 import os
 from argparse import ArgumentDefaultsHelpFormatter, ArgumentParser
-from typing import Dict, List, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
 
 from pori_python.graphkb import GraphKBConnection
 from pori_python.graphkb.genes import get_gene_information
@@ -39,7 +41,7 @@ from .ipr import (
 )
 from .summary import auto_analyst_comments
 from .therapeutic_options import create_therapeutic_options
-from .util import LOG_LEVELS, logger, trim_empty_values
+from .util import LOG_LEVELS, dumps_json, logger, trim_empty_values
 
 CACHE_GENE_MINIMUM = 5000
 RENAMED_GENE_PROPERTIES = {
@@ -47,6 +49,15 @@ RENAMED_GENE_PROPERTIES = {
     "cancerRelated": "kbStatementRelated",
     "cancerGene": "cancerGeneListMatch",
 }
+VARIANT_LIST_KEYS = (
+    "expressionVariants",
+    "smallMutations",
+    "copyVariants",
+    "structuralVariants",
+    "probeResults",
+    "msi",
+)
+DROP_VARIANT_COLUMNS = ("variant", "variantType", "histogramImage")
 
 
 def file_path(path: str) -> str:
@@ -115,6 +126,7 @@ def command_interface() -> None:
 
     args = parser.parse_args()
 
+    # stdlib json accepts the NaN/Infinity literals that json.dump writes by default
     with open(args.content, "r") as fh:
         content = json.load(fh)
 
@@ -186,16 +198,7 @@ def clean_unsupported_content(upload_content: Dict, ipr_spec: Dict = {}) -> Dict
         for key, count in removed_keys.items():
             logger.warning(f"IPR unsupported property '{key}' removed from {count} genes.")
 
-    drop_columns = ["variant", "variantType", "histogramImage"]
     # DEVSU-2034 - use a 'displayName'
-    VARIANT_LIST_KEYS = [
-        "expressionVariants",
-        "smallMutations",
-        "copyVariants",
-        "structuralVariants",
-        "probeResults",
-        "msi",
-    ]
     for variant_list_section in VARIANT_LIST_KEYS:
         for variant in upload_content.get(variant_list_section, []):
             if not variant.get("displayName"):
@@ -206,9 +209,8 @@ def clean_unsupported_content(upload_content: Dict, ipr_spec: Dict = {}) -> Dict
                 # currently probeResults will error if they do NOT have a 'variant' column.
                 # smallMutations will error if they DO have a 'variant' column.
                 continue
-            for col in drop_columns:
-                if col in variant:
-                    del variant[col]
+            for col in DROP_VARIANT_COLUMNS:
+                variant.pop(col, None)
     # tmburMutationBurden is a single value, not list
     if upload_content.get("tmburMutationBurden"):
         if not upload_content["tmburMutationBurden"].get("displayName"):
@@ -217,8 +219,9 @@ def clean_unsupported_content(upload_content: Dict, ipr_spec: Dict = {}) -> Dict
             ].get("kbCategory", "")
 
     for row in upload_content["kbMatches"]:
-        del row["kbContextId"]
-        del row["kbRelevanceId"]
+        # may already be removed by trim_empty_values, eg. statements without a subject
+        row.pop("kbContextId", None)
+        row.pop("kbRelevanceId", None)
     return upload_content
 
 
@@ -374,43 +377,29 @@ def ipr_report(
             gkb_matches.extend([Hashabledict(msi) for msi in msi_matches])
             logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
 
-    logger.info(f"annotating {len(small_mutations)} small mutations")
-    gkb_matches.extend(
-        annotate_positional_variants(
-            graphkb_conn, small_mutations, kb_disease_match, show_progress=interactive
-        )
-    )
-    logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
-
-    logger.info(f"annotating {len(structural_variants)} structural variants")
-    gkb_matches.extend(
-        annotate_positional_variants(
-            graphkb_conn, structural_variants, kb_disease_match, show_progress=interactive
-        )
-    )
-    logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
-
-    logger.info(f"annotating {len(copy_variants)} copy variants")
-    gkb_matches.extend(
-        [
-            Hashabledict(copy_var)
-            for copy_var in annotate_copy_variants(
-                graphkb_conn, copy_variants, kb_disease_match, show_progress=interactive
-            )
-        ]
-    )
-    logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
-
-    logger.info(f"annotating {len(expression_variants)} expression variants")
-    gkb_matches.extend(
-        [
-            Hashabledict(exp_var)
-            for exp_var in annotate_expression_variants(
-                graphkb_conn, expression_variants, kb_disease_match, show_progress=interactive
+    # the annotation passes are independent and bound by graphkb request latency
+    annotation_tasks: List[Tuple[str, Callable, Sequence]] = [
+        ("small mutations", annotate_positional_variants, small_mutations),
+        ("structural variants", annotate_positional_variants, structural_variants),
+        ("copy variants", annotate_copy_variants, copy_variants),
+        ("expression variants", annotate_expression_variants, expression_variants),
+    ]
+    with ThreadPoolExecutor(max_workers=len(annotation_tasks)) as executor:
+        futures = []
+        for description, annotate, variants in annotation_tasks:
+            if not variants:
+                logger.info(f"no {description} to annotate")
+                continue
+            logger.info(f"annotating {len(variants)} {description}")
+            futures.append(
+                executor.submit(
+                    annotate, graphkb_conn, variants, kb_disease_match, show_progress=interactive
+                )
             )
-        ]
-    )
-    logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
+        # collect in submission order so the matches are the same as a sequential run
+        for future in futures:
+            gkb_matches.extend([Hashabledict(match) for match in future.result()])
+            logger.debug(f"\tgkb_matches: {len(gkb_matches)}")
 
     all_variants: Sequence[IprVariant]
     all_variants = expression_variants + copy_variants + structural_variants + small_mutations  # type: ignore
@@ -456,14 +445,20 @@ def ipr_report(
         comments = {"comments": ""}
 
     # thread safe deep-copy the original content
-    output = json.loads(json.dumps(content))
+    # an orjson round-trip is faster than copy.deepcopy for plain JSON-like content
+    output = orjson.loads(dumps_json(content))
+    # all kb matches and small mutations are uploaded, so trim them in place instead of copying
+    for kb_match in gkb_matches:
+        trim_empty_values(kb_match)  # type: ignore
+    for small_mutation in small_mutations:
+        trim_empty_values(small_mutation)
     output.update(
         {
-            "kbMatches": [trim_empty_values(a) for a in gkb_matches],  # type: ignore
+            "kbMatches": gkb_matches,
             "copyVariants": [
                 trim_empty_values(c) for c in copy_variants if c["gene"] in genes_with_variants
             ],
-            "smallMutations": [trim_empty_values(s) for s in small_mutations],
+            "smallMutations": small_mutations,
             "expressionVariants": [
                 trim_empty_values(e)
                 for e in expression_variants
@@ -503,8 +498,8 @@ def ipr_report(
     if output_json_path:
         if always_write_output_json or not ipr_result:
             logger.info(f"Writing IPR upload json to: {output_json_path}")
-            with open(output_json_path, "w") as fh:
-                fh.write(json.dumps(output))
+            with open(output_json_path, "wb") as fh:
+                fh.write(dumps_json(output))
     logger.info(f"made {graphkb_conn.request_count} requests to graphkb")
     logger.info(f"average load {int(graphkb_conn.load or 0)} req/s")
     if upload_error:
@@ -2,14 +2,15 @@ from __future__ import annotations
 
 import base64
 import json
-from typing import Callable, Dict, List, Sequence, Set, Tuple, cast
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, DefaultDict, Dict, List, Sequence, Set, Tuple, cast
 from urllib.parse import urlencode
 
 from pori_python.graphkb import GraphKBConnection
 from pori_python.graphkb.constants import RELEVANCE_BASE_TERMS
-from pori_python.graphkb.statement import categorize_relevance
 from pori_python.graphkb.util import convert_to_rid_list
-from pori_python.graphkb.vocab import get_term_tree
+from pori_python.graphkb.vocab import get_term_tree, get_terms_set
 from pori_python.ipr.inputs import create_graphkb_sv_notation
 from pori_python.types import Hashabledict, IprVariant, KbMatch, Ontology, Record, Statement
 
@@ -25,20 +26,17 @@ OTHER_DISEASES = "other disease types"
 ENTREZ_GENE_URL = "https://www.ncbi.nlm.nih.gov/gene"
 # TODO: https://www.bcgsc.ca/jira/browse/DEVSU-1181
 GRAPHKB_GUI = "https://graphkb.bcgsc.ca"
+STATEMENT_BATCH_SIZE = 100
+SECTION_WORKERS = 8
 
 
 def filter_by_record_class(
     record_list: Sequence[Record], *record_classes, exclude: bool = False
 ) -> List[Record]:
     """Given a list of records, return the subset matching a class or list of classes."""
-
-    def check(name: str) -> bool:
-        if exclude:
-            return name not in record_classes
-        else:
-            return name in record_classes
-
-    return [rec for rec in record_list if check(rec["@class"])]
+    if exclude:
+        return [rec for rec in record_list if rec["@class"] not in record_classes]
+    return [rec for rec in record_list if rec["@class"] in record_classes]
 
 
 def natural_join(word_list: List[str]) -> str:
@@ -55,7 +53,7 @@ def get_displayname(rec: Record) -> str:
 def natural_join_records(
     records: Sequence[Record], covert_to_word: Callable[[Record], str] = get_displayname
 ) -> str:
-    word_list = sorted(list({covert_to_word(rec) for rec in records}))
+    word_list = sorted({covert_to_word(rec) for rec in records})
     return natural_join(word_list)
 
 
@@ -63,7 +61,7 @@ def create_graphkb_link(record_ids: List[str], record_class: str = "Statement")
     """
     Create a link for a set of statements to the GraphKB client
     """
-    record_ids = sorted(list(set(record_ids)))
+    record_ids = sorted(set(record_ids))
     if len(record_ids) == 1:
         return f'{GRAPHKB_GUI}/view/{record_class}/{record_ids[0].replace("#", "")}'
     complex_param = base64.b64encode(json.dumps({"target": record_ids}).encode("utf-8"))
@@ -77,9 +75,7 @@ def merge_diseases(
     if len(convert_to_rid_set(diseases) - disease_matches) >= 2 and all(
         [d["@class"] == "Disease" for d in diseases]
     ):
-        words = sorted(
-            list(set([get_displayname(s) for s in diseases if s["@rid"] in disease_matches]))
-        )
+        words = sorted({get_displayname(s) for s in diseases if s["@rid"] in disease_matches})
         words.append(OTHER_DISEASES)
         return natural_join(words)
     else:
@@ -98,31 +94,24 @@ def substitute_sentence_template(
     """Create the filled-in sentence template for a given template and list of substitutions
     which may be the result of the aggregation of 1 or more statements.
     """
-    disease_conditions = filter_by_record_class(conditions, "Disease")
-    variant_conditions = filter_by_record_class(
-        conditions, "CategoryVariant", "CatalogueVariant", "PositionalVariant"
-    )
-    other_conditions = filter_by_record_class(
-        conditions,
-        "CategoryVariant",
-        "CatalogueVariant",
-        "PositionalVariant",
-        "Disease",
-        exclude=True,
-    )
+    # remove subject from the conditions replacements
+    subjects_ids = convert_to_rid_set(subjects) if r"{subject}" in template else set()
+    disease_conditions: List[Ontology] = []
+    variant_conditions: List[Ontology] = []
+    other_conditions: List[Ontology] = []
+    for condition in conditions:
+        if condition["@rid"] in subjects_ids:
+            continue
+        if condition["@class"] == "Disease":
+            disease_conditions.append(condition)
+        elif condition["@class"] in ("CategoryVariant", "CatalogueVariant", "PositionalVariant"):
+            variant_conditions.append(condition)
+        else:
+            other_conditions.append(condition)
+
     result = template.replace(r"{relevance}", relevance["displayName"])
 
     if r"{subject}" in template:
-        # remove subject from the conditions replacements
-        subjects_ids = convert_to_rid_set(subjects)
-        disease_conditions = [
-            cast(Ontology, d) for d in disease_conditions if d["@rid"] not in subjects_ids
-        ]
-        variant_conditions = [
-            cast(Ontology, d) for d in variant_conditions if d["@rid"] not in subjects_ids
-        ]
-        other_conditions = [d for d in other_conditions if d["@rid"] not in subjects_ids]
-
         result = result.replace(r"{subject}", merge_diseases(subjects, disease_matches))
 
     if r"{conditions:disease}" in template:
@@ -142,7 +131,7 @@ def substitute_sentence_template(
     link_url = create_graphkb_link(statement_rids) if statement_rids else ""
 
     if r"{evidence}" in template:
-        evidence_str = ", ".join(sorted(list({e["displayName"] for e in evidence})))
+        evidence_str = ", ".join(sorted({e["displayName"] for e in evidence}))
         if link_url:
             evidence_str = f'<a href="{link_url}" target="_blank" rel="noopener">{evidence_str}</a>'
         result = result.replace(r"{evidence}", evidence_str)
@@ -159,13 +148,14 @@ def aggregate_statements(
     """
     Group Statements that only differ in disease conditions and evidence
     """
-    hash_other: Dict[Tuple, List[Statement]] = {}
+    hash_other: DefaultDict[Tuple, List[Statement]] = defaultdict(list)
 
     def generate_key(statement: Statement) -> Tuple:
+        subject_rid = statement["subject"]["@rid"]
         result = [
             cond.get("displayName", cond["@rid"])
-            for cond in filter_by_record_class(statement["conditions"], "Disease", exclude=True)
-            if cond["@rid"] != statement["subject"]["@rid"]
+            for cond in statement["conditions"]
+            if cond["@class"] != "Disease" and cond["@rid"] != subject_rid
         ]
         if statement.get("subject", {}).get("@class", "Disease") != "Disease":
             subject = statement["subject"]
@@ -179,7 +169,7 @@ def aggregate_statements(
 
     for statement in statements:
         key = generate_key(statement)
-        hash_other.setdefault(key, []).append(statement)
+        hash_other[key].append(statement)
 
     result = {}
     for key, group in hash_other.items():
@@ -214,29 +204,31 @@ def display_variant(variant: IprVariant) -> str:
     if not gene and "gene1" in variant and "gene2" in variant:
         gene = f'({variant.get("gene1", "")},{variant.get("gene2", "")})'
 
-    if variant.get("kbCategory"):
-        return f'{variant.get("kbCategory")} of {gene}'
+    kb_category = variant.get("kbCategory")
+    if kb_category:
+        return f"{kb_category} of {gene}"
 
     # Special display of IprFusionVariant with exons
     if variant.get("exon1") or variant.get("exon2"):
         return create_graphkb_sv_notation(variant)  # type: ignore
 
     # Use chosen legacy 'proteinChange' or an hgvs description of lowest detail.
-    hgvs = variant.get(
-        "proteinChange",
-        variant.get("hgvsProtein", variant.get("hgvsCds", variant.get("hgvsGenomic", ""))),
-    )
+    hgvs = ""
+    for hgvs_key in ("proteinChange", "hgvsProtein", "hgvsCds", "hgvsGenomic"):
+        if hgvs_key in variant:
+            hgvs = variant[hgvs_key]  # type: ignore
+            break
 
     if gene and hgvs:
         return f"{gene}:{hgvs}"
     elif variant.get("variant"):
-        return str(variant.get("variant"))
+        return str(variant["variant"])
 
     raise ValueError(f"Unable to form display_variant of {variant}")
 
 
 def display_variants(gene_name: str, variants: List[IprVariant]) -> str:
-    result = sorted(list({v for v in [display_variant(e) for e in variants] if gene_name in v}))
+    result = sorted({v for v in map(display_variant, variants) if gene_name in v})
     variants_text = natural_join(result)
     if len(result) > 1:
         return (
@@ -247,26 +239,44 @@ def display_variants(gene_name: str, variants: List[IprVariant]) -> str:
     return ""
 
 
+def get_relevance_categories(graphkb_conn: GraphKBConnection) -> Dict[str, str]:
+    """Map relevance term rids to their comment section category.
+
+    Terms under more than one category keep the first, as categorize_relevance does.
+    """
+    categories: Dict[str, str] = {}
+    for category, base_terms in RELEVANCE_BASE_TERMS + [("resistance", ["no sensitivity"])]:
+        for rid in get_terms_set(graphkb_conn, base_terms):
+            categories.setdefault(rid, category)
+    return categories
+
+
 def create_section_html(
     graphkb_conn: GraphKBConnection,
     gene_name: str,
     sentences_by_statement_id: Dict[str, str],
     statements: Dict[str, Statement],
     exp_variants: List[IprVariant],
+    relevance_categories: Dict[str, str] | None = None,
 ) -> str:
     """
     Generate HTML for a gene section of the comments
     """
     output = [f"<h2>{gene_name}</h2>"]
 
+    variants_text = display_variants(gene_name, exp_variants)
+    if not variants_text:
+        # exclude sections where they are not linked to an experimental variant. this can occur when there are co-occurent statements collected
+        return ""
+
+    if relevance_categories is None:
+        relevance_categories = get_relevance_categories(graphkb_conn)
+
     sentence_categories: Dict[str, str] = {}
 
     for statement_id, sentence in sentences_by_statement_id.items():
         relevance = statements[statement_id]["relevance"]["@rid"]
-        category = categorize_relevance(
-            graphkb_conn, relevance, RELEVANCE_BASE_TERMS + [("resistance", ["no sensitivity"])]
-        )
-        sentence_categories[sentence] = category
+        sentence_categories[sentence] = relevance_categories.get(relevance, "")
 
     # get the entrez gene descriptive hugo name
     genes = graphkb_conn.query(
@@ -283,10 +293,6 @@ def create_section_html(
     )
     genes = sorted(genes, key=generate_ontology_preference_key)  # type: ignore
 
-    variants_text = display_variants(gene_name, exp_variants)
-    if not variants_text:
-        # exclude sections where they are not linked to an experimental variant. this can occur when there are co-occurent statements collected
-        return ""
     if genes and genes[0].get("description", ""):
         description = ". ".join(genes[0]["description"].split(". ")[:2])  # type: ignore
         sourceId = genes[0].get("sourceId", "")
@@ -302,21 +308,20 @@ def create_section_html(
 """
         )
 
-    sentences_used: Set[str] = set()
-
-    for section in [
-        {s for (s, v) in sentence_categories.items() if v == "diagnostic"},
-        {s for (s, v) in sentence_categories.items() if v == "biological"},
-        {s for (s, v) in sentence_categories.items() if v in ["therapeutic", "prognostic"]},
-        {
-            s
-            for (s, v) in sentence_categories.items()
-            if v not in ["diagnostic", "biological", "therapeutic", "prognostic", "resistance"]
-        },
-        {s for (s, v) in sentence_categories.items() if v == "resistance"},
-    ]:
-        content = ". ".join(sorted(list(section - sentences_used)))
-        sentences_used.update(section)
+    # paragraphs: diagnostic, biological, therapeutic/prognostic, any other category, resistance
+    paragraph_index = {
+        "diagnostic": 0,
+        "biological": 1,
+        "therapeutic": 2,
+        "prognostic": 2,
+        "resistance": 4,
+    }
+    paragraphs: List[List[str]] = [[], [], [], [], []]
+    for sentence, category in sentence_categories.items():
+        paragraphs[paragraph_index.get(category, 3)].append(sentence)
+
+    for paragraph in paragraphs:
+        content = ". ".join(sorted(paragraph))
         output.append(f"<p>{content}</p>")
     return "\n".join(output)
 
@@ -325,21 +330,48 @@ def section_statements_by_genes(
     graphkb_conn: GraphKBConnection, statements: Sequence[Statement]
 ) -> Dict[str, Set[str]]:
     """Create Dict of statement @rid sets indexed by preferred gene names in conditions."""
-    genes: Dict[str, Set[str]] = {}
+    genes: DefaultDict[str, Set[str]] = defaultdict(set)
+    # the same features recur across statements, resolve each only once
+    gene_names: Dict[str, str] = {}
+
+    def preferred_gene_name(record_id: str) -> str:
+        if record_id not in gene_names:
+            gene_names[record_id] = get_preferred_gene_name(graphkb_conn, record_id)
+        return gene_names[record_id]
 
     for statement in statements:
         for condition in statement["conditions"]:
             if condition.get("biotype", "") == "gene":
-                gene = get_preferred_gene_name(graphkb_conn, condition["@rid"])
-                genes.setdefault(gene, set()).add(statement["@rid"])
+                gene = preferred_gene_name(condition["@rid"])
+                genes[gene].add(statement["@rid"])
             else:
                 for cond_ref_key in ("reference1", "reference2"):
                     cond_ref_gene = condition.get(cond_ref_key)
                     if cond_ref_gene:
-                        gene = get_preferred_gene_name(graphkb_conn, str(cond_ref_gene))
-                        genes.setdefault(gene, set()).add(statement["@rid"])
+                        gene = preferred_gene_name(str(cond_ref_gene))
+                        genes[gene].add(statement["@rid"])
 
-    return genes
+    return dict(genes)
+
+
+def get_statements_by_rids(
+    graphkb_conn: GraphKBConnection,
+    statement_rids: Sequence[str],
+    batch_size: int = STATEMENT_BATCH_SIZE,
+) -> List[Statement]:
+    """Fetch statements and their neighbors in batches rather than one request per statement.
+
+    Duplicate ids are fetched once and the statements are returned in order of first appearance.
+    The statements are copies, so callers may modify them without changing the query cache.
+    """
+    rids = list(dict.fromkeys(statement_rids))
+    statements_by_rid: Dict[str, Statement] = {}
+    for start in range(0, len(rids), batch_size):
+        for record in graphkb_conn.query(
+            {"target": rids[start : start + batch_size], "neighbors": 1}
+        ):
+            statements_by_rid[record["@rid"]] = cast(Statement, {**record})
+    return [statements_by_rid[rid] for rid in rids if rid in statements_by_rid]
 
 
 def auto_analyst_comments(
@@ -349,15 +381,15 @@ def auto_analyst_comments(
     variants: Sequence[IprVariant],
 ) -> str:
     """Given a list of GraphKB matches, generate a text summary to add to the report."""
-    templates: Dict[str, List[Statement]] = {}
+    templates: DefaultDict[str, List[Statement]] = defaultdict(list)
     statements: Dict[str, Statement] = {}
     variants_by_keys = {v["key"]: v for v in variants}
-    variant_keys_by_statement_ids: Dict[str, Set[str]] = {}
+    variant_keys_by_statement_ids: DefaultDict[str, Set[str]] = defaultdict(set)
 
     for match in matches:
         rid = match["kbStatementId"]
         exp_variant = match["variant"]
-        variant_keys_by_statement_ids.setdefault(rid, set()).add(exp_variant)
+        variant_keys_by_statement_ids[rid].add(exp_variant)
 
     exp_variants_by_statements: Dict[str, List[IprVariant]] = {}
     for rid, keys in variant_keys_by_statement_ids.items():
@@ -372,11 +404,8 @@ def auto_analyst_comments(
     )
 
     # get details for statements
-    for match in matches:
-        rid = match["kbStatementId"].replace("#", "")
-        result = graphkb_conn.request(f"/statements/{rid}?neighbors=1")["result"]
-
-        templates.setdefault(result["displayNameTemplate"], []).append(result)
+    for result in get_statements_by_rids(graphkb_conn, [m["kbStatementId"] for m in matches]):
+        templates[result["displayNameTemplate"]].append(result)
         statements[result["@rid"]] = result
 
     # aggregate similar sentences
@@ -387,26 +416,34 @@ def auto_analyst_comments(
     # section statements by genes
     statements_by_genes = section_statements_by_genes(graphkb_conn, list(statements.values()))
 
+    relevance_categories = get_relevance_categories(graphkb_conn)
+
     output: List[str] = [
         "<h3>The comments below were automatically generated from matches to GraphKB and have not been manually reviewed</h3>"
     ]
 
-    for section, statement_rids in sorted(
-        statements_by_genes.items(), key=lambda x: len(x[1]), reverse=True
-    ):
-        exp_variants = {}
-        for variant_list in [exp_variants_by_statements[r] for r in statement_rids]:
-            for variant in variant_list:
-                exp_variants[variant["key"]] = variant
-
-        output.append(
-            create_section_html(
-                graphkb_conn,
-                section,
-                {r: sentences[r] for r in statement_rids},
-                {r: statements[r] for r in statement_rids},
-                list(exp_variants.values()),
+    # sections are independent and bound by the graphkb gene description queries
+    with ThreadPoolExecutor(max_workers=SECTION_WORKERS) as executor:
+        futures = []
+        for section, statement_rids in sorted(
+            statements_by_genes.items(), key=lambda x: len(x[1]), reverse=True
+        ):
+            exp_variants = {}
+            for variant_list in [exp_variants_by_statements[r] for r in statement_rids]:
+                for variant in variant_list:
+                    exp_variants[variant["key"]] = variant
+
+            futures.append(
+                executor.submit(
+                    create_section_html,
+                    graphkb_conn,
+                    section,
+                    {r: sentences[r] for r in statement_rids},
+                    {r: statements[r] for r in statement_rids},
+                    list(exp_variants.values()),
+                    relevance_categories=relevance_categories,
+                )
             )
-        )
+        output.extend(future.result() for future in futures)
 
     return "\n".join(output)
@@ -4,17 +4,23 @@ upload variant and report information to IPR
 
 from __future__ import annotations
 
-import pandas
-from typing import Any, Dict, List, Sequence
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from operator import itemgetter
+from typing import Any, DefaultDict, Dict, List, Sequence, Set, Tuple
 
 from pori_python.graphkb import GraphKBConnection
-from pori_python.types import Hashabledict, IprVariant, KbMatch
+from pori_python.graphkb.vocab import get_terms_set
+from pori_python.types import Hashabledict, IprVariant, KbMatch, Ontology
 
-from .util import (
-    create_variant_name_tuple,
-    find_variant,
-    get_preferred_drug_representation,
-    get_terms_set,
+from .util import build_variant_index, create_variant_name_tuple, get_preferred_drug_representation
+
+DRUG_LOOKUP_WORKERS = 8
+
+# kb match fields used to build each option, fetched in one call per match
+get_match_fields = itemgetter(
+    "variantType", "variant", "kbContextId", "relevance", "kbRelevanceId", "evidenceLevel"
 )
 
 
@@ -27,57 +33,70 @@ def create_therapeutic_options(
     Generate therapeutic options summary from the list of kb-matches
     """
     options: List[Dict[str, Any]] = []
+    therapeutic_matches = [
+        match
+        for match in kb_matches
+        if match["category"] == "therapeutic" and match["relevance"] != "eligibility"
+    ]
+    if not therapeutic_matches:
+        return options
+
     resistance_markers = get_terms_set(graphkb_conn, ["no sensitivity"])
+    variant_index = build_variant_index(variants)
 
-    for match in kb_matches:
+    # many matches share the same drug, resolve each one once and concurrently since
+    # every lookup is a graphkb request
+    drug_rids = list(dict.fromkeys(match["kbContextId"] for match in therapeutic_matches))
+    with ThreadPoolExecutor(max_workers=DRUG_LOOKUP_WORKERS) as executor:
+        drugs: Dict[str, Ontology] = dict(
+            zip(
+                drug_rids,
+                executor.map(
+                    lambda rid: get_preferred_drug_representation(graphkb_conn, rid), drug_rids
+                ),
+            )
+        )
+
+    def delimited_list(inputs: Set[str], delimiter: str = " / ") -> str:
+        return delimiter.join(sorted(i for i in inputs if i))
+
+    # options that only differ by evidence level or context are merged as they are built
+    grouped: DefaultDict[Tuple[str, str, str, str], Dict[str, Set[str]]] = defaultdict(
+        lambda: {"evidenceLevel": set(), "context": set()}
+    )
+    for match in therapeutic_matches:
+        variant_type, variant_key, drug_rid, relevance, relevance_rid, evidence_level = (
+            get_match_fields(match)
+        )
         row_type = "therapeutic"
-        if match["category"] != "therapeutic" or match["relevance"] == "eligibility":
-            continue
-        if match["kbRelevanceId"] in resistance_markers:
+        if relevance_rid in resistance_markers:
             row_type = "chemoresistance"
-        variant = find_variant(variants, match["variantType"], match["variant"])
-        drug = get_preferred_drug_representation(graphkb_conn, match["kbContextId"])
-
+        try:
+            variant = variant_index[(variant_type, variant_key)]
+        except KeyError:
+            raise KeyError(
+                f"expected variant ({variant_key}, {variant_type}) does not exist"
+            ) from None
         gene, variant_string = create_variant_name_tuple(variant)
 
+        group = grouped[(gene, row_type, drugs[drug_rid]["displayName"], variant_string)]
+        group["evidenceLevel"].add(evidence_level)
+        group["context"].add(relevance)
+
+    therapeutic_ranks = count()
+    chemoresistance_ranks = count()
+    for (gene, row_type, therapy, variant), group in sorted(grouped.items()):
+        ranks = therapeutic_ranks if row_type == "therapeutic" else chemoresistance_ranks
         options.append(
             {
                 "gene": gene,
                 "type": row_type,
-                "therapy": drug["displayName"],
-                "therapyGraphkbId": drug["@rid"],
-                "context": match["relevance"],
-                "contextGraphkbId": match["kbRelevanceId"],
-                "variantGraphkbId": match["kbVariantId"],
-                "variant": variant_string,
-                "evidenceLevel": match["evidenceLevel"],
-                "kbStatementIds": match["kbStatementId"],
+                "therapy": therapy,
+                "variant": variant,
+                "evidenceLevel": delimited_list(group["evidenceLevel"]),
+                "context": delimited_list(group["context"]),
                 "notes": "",
+                "rank": next(ranks),
             }
         )
-    if not options:
-        return options
-    options_df = pandas.DataFrame.from_records(options)
-
-    def delimited_list(inputs: List, delimiter: str = " / ") -> str:
-        return delimiter.join(sorted(list({i for i in inputs if i})))
-
-    options_df = options_df.groupby(["gene", "type", "therapy", "variant"]).agg(
-        {
-            "evidenceLevel": delimited_list,
-            "context": delimited_list,
-            "notes": lambda x: delimited_list(x, " "),
-        }
-    )
-    options_df = options_df.reset_index()
-    options = options_df.to_dict("records")  # type: ignore
-    therapeutic_rank = 0
-    chemoresistance_rank = 0
-    for option in options:
-        if option["type"] == "therapeutic":
-            option["rank"] = therapeutic_rank
-            therapeutic_rank += 1
-        else:
-            option["rank"] = chemoresistance_rank
-            chemoresistance_rank += 1
     return options
@@ -1,12 +1,15 @@
+from __future__ import annotations
+
 import hashlib
 import json
 import logging
+import orjson
 import pandas as pd
 from numpy import nan
 from typing import Any, Dict, List, Sequence, Set, Tuple, cast
 
 from pori_python.graphkb import GraphKBConnection
-from pori_python.graphkb.vocab import get_term_tree
+from pori_python.graphkb import vocab as gkb_vocab
 from pori_python.types import IprVariant, Ontology, Record
 
 GENE_NEIGHBORS_MAX = 3
@@ -21,13 +24,14 @@ LOG_LEVELS = {
 }
 
 
+def dumps_json(data: Any) -> bytes:
+    """Serialize to JSON bytes with orjson, allowing numpy values and non-string keys"""
+    return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
 def get_terms_set(graphkb_conn: GraphKBConnection, base_terms: List[str]) -> Set[str]:
-    terms = set()
-    for base_term in base_terms:
-        terms.update(
-            convert_to_rid_set(get_term_tree(graphkb_conn, base_term, include_superclasses=False))
-        )
-    return terms
+    """Kept for backwards compatibility, see pori_python.graphkb.vocab.get_terms_set"""
+    return gkb_vocab.get_terms_set(graphkb_conn, base_terms)
 
 
 def hash_key(key: Tuple[str]) -> str:
@@ -41,12 +45,14 @@ def convert_to_rid_set(records: Sequence[Record]) -> Set[str]:
 
 
 def trim_empty_values(obj: IprVariant, empty_values: Sequence = ("", None, nan)):
+    """Remove keys with empty values from the variant, in place."""
     blacklist = ("gene1", "gene2")  # allow null for sv genes
-    keys = list(obj.keys())
+    empty_keys = [
+        key for key, value in obj.items() if value in empty_values and key not in blacklist
+    ]
 
-    for key in keys:
-        if obj[key] in empty_values and key not in blacklist:  # type: ignore
-            del obj[key]  # type: ignore
+    for key in empty_keys:
+        del obj[key]  # type: ignore
     return obj
 
 
@@ -86,6 +92,16 @@ def find_variant(
     raise KeyError(f"expected variant ({variant_key}, {variant_type}) does not exist")
 
 
+def build_variant_index(all_variants: Sequence[IprVariant]) -> Dict[Tuple[str, str], IprVariant]:
+    """
+    Index variants by their type and key, keeping the first as find_variant does
+    """
+    index: Dict[Tuple[str, str], IprVariant] = {}
+    for variant in all_variants:
+        index.setdefault((variant["variantType"], variant["key"]), variant)
+    return index
+
+
 def generate_ontology_preference_key(record: Ontology, sources_sort: Dict[str, int] = {}) -> Tuple:
     """Generate a tuple key for comparing preferred ontology terms."""
     return (
@@ -90,6 +90,8 @@ class KbMatch(TypedDict):
 
 
 class Hashabledict(dict):
+    __slots__ = ()  # no per-instance __dict__ or __weakref__
+
     def __hash__(self):
         return hash(frozenset(self))
 
@@ -1,5 +1,10 @@
+import requests
+
 import os
 import pytest
+import socket
+from unittest.mock import patch
+from urllib3.connectionpool import HTTPConnectionPool
 
 from pori_python.graphkb import GraphKBConnection, util
 
@@ -149,3 +154,36 @@ class TestStringifyVariant:
         variant = conn.get_record_by_id(rid)
         if variant and variant.get("createdAt", None) == createdAt:
             assert util.stringifyVariant(variant=variant, **opt) == stringifiedVariant
+
+
+class TestConnectionRetries:
+    @pytest.fixture
+    def unreachable_conn(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        return GraphKBConnection(f"http://127.0.0.1:{port}", use_global_cache=False)
+
+    @pytest.fixture
+    def attempts(self):
+        """Count every connection attempt, including any retried inside urllib3"""
+        with patch.object(
+            HTTPConnectionPool, "urlopen", autospec=True, side_effect=HTTPConnectionPool.urlopen
+        ) as attempts, patch.object(util.time, "sleep"):
+            yield attempts
+
+    @pytest.mark.parametrize("scheme", ["http", "https"])
+    def test_session_does_not_retry(self, scheme) -> None:
+        conn = GraphKBConnection(f"{scheme}://graphkb.test", use_global_cache=False)
+        assert conn.http.get_adapter(f"{scheme}://graphkb.test").max_retries.total == 0
+
+    def test_login_attempts_bounded(self, unreachable_conn, attempts) -> None:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            unreachable_conn.login("user", "pass")
+        assert attempts.call_count == 10
+
+    def test_request_attempts_bounded(self, unreachable_conn, attempts) -> None:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            unreachable_conn.request("query", method="POST", data="{}")
+        # each of the 15 request attempts refreshes the login, which tries 10 times
+        assert attempts.call_count == 15 * 10
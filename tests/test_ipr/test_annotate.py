@@ -1,8 +1,9 @@
 import os
 import pytest
+from unittest.mock import ANY, MagicMock, patch
 
 from pori_python.graphkb import GraphKBConnection
-from pori_python.ipr.annotate import annotate_positional_variants
+from pori_python.ipr.annotate import annotate_copy_variants, annotate_positional_variants
 from pori_python.types import IprSmallMutationVariant
 
 EXCLUDE_BCGSC_TESTS = os.environ.get("EXCLUDE_BCGSC_TESTS") == "1"
@@ -88,6 +89,45 @@ def graphkb_conn():
     return graphkb_conn
 
 
+def test_annotate_copy_variants_matches_duplicate_rows_once():
+    variants = [
+        {"key": "a", "gene": "KRAS", "variant": "amplification"},
+        {"key": "b", "gene": "KRAS", "variant": "amplification"},
+    ]
+    with patch("pori_python.ipr.annotate.gkb_match.match_copy_variant") as match_copy, patch(
+        "pori_python.ipr.annotate.get_ipr_statements_from_variants",
+        return_value=[{"kbStatementId": "#1:1", "kbData": {}}],
+    ):
+        matched = annotate_copy_variants(MagicMock(), variants, "cancer")  # type: ignore
+    assert match_copy.call_count == 1
+    assert [m["variant"] for m in matched] == ["a", "b"]
+    assert matched[0] is not matched[1]
+
+
+def test_annotate_positional_variants_rewrites_malformed_deletion():
+    variants = [{"key": "a", "gene": "GENE", "hgvsGenomic": "chr1:g.150951027T>"}]
+    with patch(
+        "pori_python.ipr.annotate.gkb_match.match_positional_variant", return_value=[]
+    ) as match_positional, patch(
+        "pori_python.ipr.annotate.get_ipr_statements_from_variants", return_value=[]
+    ):
+        annotate_positional_variants(MagicMock(), variants, "cancer")  # type: ignore
+    match_positional.assert_called_once_with(ANY, "chr1:g.150951027del")
+
+
+def test_annotate_positional_variants_drops_duplicate_matches():
+    variants = [
+        {"key": "a", "gene": "GENE", "variant": "GENE:p.G12D", "hgvsProtein": "GENE:p.G12D"}
+    ]
+    row = {"kbStatementId": "#1:1", "kbVariantId": "#2:1", "kbData": {}, "evidence": ["x"]}
+    with patch("pori_python.ipr.annotate.gkb_match.match_positional_variant"), patch(
+        "pori_python.ipr.annotate.get_ipr_statements_from_variants",
+        side_effect=lambda *args: [dict(row)],
+    ):
+        matched = annotate_positional_variants(MagicMock(), variants, "cancer")  # type: ignore
+    assert matched == [{**row, "variant": "a", "variantType": "mut"}]
+
+
 @pytest.mark.skipif(
     EXCLUDE_BCGSC_TESTS, reason="excluding tests that depend on BCGSC-specific data"
 )
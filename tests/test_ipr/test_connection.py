@@ -1,5 +1,8 @@
+import numpy as np
+import orjson
 import os
 import pytest
+import zlib
 from unittest import mock
 
 from pori_python.ipr.connection import IprConnection
@@ -7,6 +10,17 @@ from pori_python.ipr.connection import IprConnection
 IMAGE_DIR = os.path.join(os.path.dirname(__file__), "../../docs/images")
 
 
+def test_post_accepts_numpy_values():
+    request = mock.MagicMock(
+        return_value=mock.MagicMock(json=lambda: {}, raise_for_status=lambda: None)
+    )
+    with mock.patch("pori_python.ipr.connection.requests.request", request):
+        IprConnection("user", "pass").post("reports", {"ploidy": np.float64(2.5), 1: np.int64(3)})
+
+    body = orjson.loads(zlib.decompress(request.call_args.kwargs["data"]))
+    assert body == {"ploidy": 2.5, "1": 3}
+
+
 class TestPostImages:
     def test_no_images_ok(self):
         def request(*args, **kwargs):
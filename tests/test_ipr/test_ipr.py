@@ -1,5 +1,6 @@
 import pytest
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from pori_python.graphkb import statement as gkb_statement
 from pori_python.graphkb import vocab as gkb_vocab
@@ -143,28 +144,37 @@ SOMATIC_KB_MATCHES = [
 ]
 
 
-@pytest.fixture
-def graphkb_conn():
-    class QueryMock:
-        return_values = [
-            # get approved evidence levels
-            [{"@rid": v} for v in APPROVED_EVIDENCE_RIDS]
-        ]
-        index = -1
+class QueryMock:
+    return_values = [
+        # get approved evidence levels
+        [{"@rid": v} for v in APPROVED_EVIDENCE_RIDS]
+    ]
+    index = -1
 
-        def __call__(self, *args, **kwargs):
-            self.index += 1
-            ret_val = self.return_values[self.index] if self.index < len(self.return_values) else []
-            return ret_val
+    def __call__(self, *args, **kwargs):
+        self.index += 1
+        ret_val = self.return_values[self.index] if self.index < len(self.return_values) else []
+        return ret_val
 
-    def mock_get_source(source):
-        return {"@rid": 0}
 
-    conn = Mock(query=QueryMock(), cache={}, get_source=mock_get_source)
+def mock_get_source(source):
+    return {"@rid": 0}
+
+
+@pytest.fixture(scope="module")
+def graphkb_conn():
+    conn = SimpleNamespace(query=QueryMock(), cache={}, get_source=mock_get_source)
 
     return conn
 
 
+@pytest.fixture
+def reset_graphkb_conn(graphkb_conn):
+    """Each test replays the query responses from the start with an empty cache."""
+    graphkb_conn.query.index = -1
+    graphkb_conn.cache.clear()
+
+
 def base_graphkb_statement(disease_id: str = "disease", relevance_rid: str = "other") -> Statement:
     statement = Statement(  # type: ignore
         {
@@ -195,24 +205,25 @@ def base_graphkb_statement(disease_id: str = "disease", relevance_rid: str = "ot
     return statement
 
 
-@pytest.fixture(autouse=True)
-def mock_get_term_tree(monkeypatch):
-    def mock_func(*pos, **kwargs):
-        return [{"@rid": d} for d in DISEASE_RIDS]
+def mock_get_term_tree(*pos, **kwargs):
+    return [{"@rid": d} for d in DISEASE_RIDS]
 
-    monkeypatch.setattr(gkb_vocab, "get_term_tree", mock_func)
 
+def mock_categorize_relevance(_, relevance_id):
+    return relevance_id
 
-@pytest.fixture(autouse=True)
-def mock_categorize_relevance(monkeypatch):
-    def mock_func(_, relevance_id):
-        return relevance_id
 
-    monkeypatch.setattr(gkb_statement, "categorize_relevance", mock_func)
+@pytest.fixture(scope="class")
+def mock_graphkb_vocab():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(gkb_vocab, "get_term_tree", mock_get_term_tree)
+        mp.setattr(gkb_statement, "categorize_relevance", mock_categorize_relevance)
+        yield
 
 
+@pytest.mark.usefixtures("mock_graphkb_vocab", "reset_graphkb_conn")
 class TestConvertStatementsToAlterations:
-    def test_disease_match(self, graphkb_conn, mock_get_term_tree) -> None:
+    def test_disease_match(self, graphkb_conn) -> None:
         statement = base_graphkb_statement(DISEASE_RIDS[0])
         result = convert_statements_to_alterations(
             graphkb_conn, [statement], "disease", {"variant_rid"}
@@ -249,16 +260,19 @@ class TestConvertStatementsToAlterations:
         row = result[0]
         assert not row["matchedCancer"]
 
-    def test_biological(self, graphkb_conn) -> None:
-        statement = base_graphkb_statement()
-        statement["relevance"]["@rid"] = "biological"
+    @pytest.mark.parametrize(
+        "disease_rid,category",
+        [("disease", "biological"), ("disease", "diagnostic"), (DISEASE_RIDS[0], "prognostic")],
+    )
+    def test_category(self, graphkb_conn, disease_rid, category) -> None:
+        statement = base_graphkb_statement(disease_rid, category)
 
         result = convert_statements_to_alterations(
             graphkb_conn, [statement], "disease", {"variant_rid"}
         )
         assert len(result) == 1
         row = result[0]
-        assert row["category"] == "biological"
+        assert row["category"] == category
 
     def test_prognostic_no_disease_match(self, graphkb_conn) -> None:
         statement = base_graphkb_statement()
@@ -269,28 +283,6 @@ class TestConvertStatementsToAlterations:
         )
         assert len(result) == 0
 
-    def test_prognostic_disease_match(self, graphkb_conn) -> None:
-        statement = base_graphkb_statement(DISEASE_RIDS[0])
-        statement["relevance"]["@rid"] = "prognostic"
-
-        result = convert_statements_to_alterations(
-            graphkb_conn, [statement], "disease", {"variant_rid"}
-        )
-        assert len(result) == 1
-        row = result[0]
-        assert row["category"] == "prognostic"
-
-    def test_diagnostic(self, graphkb_conn) -> None:
-        statement = base_graphkb_statement()
-        statement["relevance"]["@rid"] = "diagnostic"
-
-        result = convert_statements_to_alterations(
-            graphkb_conn, [statement], "disease", {"variant_rid"}
-        )
-        assert len(result) == 1
-        row = result[0]
-        assert row["category"] == "diagnostic"
-
     @patch("pori_python.ipr.ipr.get_evidencelevel_mapping")
     def test_unapproved_therapeutic(self, mock_get_evidencelevel_mapping, graphkb_conn) -> None:
         mock_get_evidencelevel_mapping.return_value = {"other": "test"}
@@ -1,29 +1,22 @@
-import json
+import math
+import orjson
 import os
-import pandas as pd
 import pytest
 import sys
+from contextlib import ExitStack
 from typing import Dict
 from unittest.mock import MagicMock, patch
 
 from pori_python.ipr.connection import IprConnection
-from pori_python.ipr.main import command_interface
-from pori_python.types import IprGene
+from pori_python.ipr.main import clean_unsupported_content, command_interface
 
 from .constants import EXCLUDE_INTEGRATION_TESTS
+from .util import get_test_spec, load_variant_records
 
 EXCLUDE_BCGSC_TESTS = os.environ.get("EXCLUDE_BCGSC_TESTS") == "1"
 EXCLUDE_ONCOKB_TESTS = os.environ.get("EXCLUDE_ONCOKB_TESTS") == "1"
 
 
-def get_test_spec():
-    ipr_spec = {"components": {"schemas": {"genesCreate": {"properties": {}}}}}
-    ipr_gene_keys = IprGene.__required_keys__ | IprGene.__optional_keys__
-    for key in ipr_gene_keys:
-        ipr_spec["components"]["schemas"]["genesCreate"]["properties"][key] = ""
-    return ipr_spec
-
-
 def get_test_file(name: str) -> str:
     return os.path.join(os.path.dirname(__file__), "test_data", name)
 
@@ -32,8 +25,8 @@ def get_test_file(name: str) -> str:
 def report_upload_content(tmp_path_factory) -> Dict:
     mock = MagicMock()
     json_file = tmp_path_factory.mktemp("inputs") / "content.json"
-    json_file.write_text(
-        json.dumps(
+    json_file.write_bytes(
+        orjson.dumps(
             {
                 "blargh": "some fake content",
                 "comparators": [
@@ -44,54 +37,37 @@ def report_upload_content(tmp_path_factory) -> Dict:
                 ],
                 "patientId": "PATIENT001",
                 "project": "TEST",
-                "expressionVariants": json.loads(
-                    pd.read_csv(get_test_file("expression.short.tab"), sep="\t").to_json(
-                        orient="records"
-                    )
-                ),
-                "smallMutations": json.loads(
-                    pd.read_csv(get_test_file("small_mutations.short.tab"), sep="\t").to_json(
-                        orient="records"
-                    )
-                ),
-                "copyVariants": json.loads(
-                    pd.read_csv(get_test_file("copy_variants.short.tab"), sep="\t").to_json(
-                        orient="records"
-                    )
-                ),
-                "structuralVariants": json.loads(
-                    pd.read_csv(get_test_file("fusions.tab"), sep="\t").to_json(orient="records")
-                ),
+                "expressionVariants": load_variant_records(get_test_file("expression.short.tab")),
+                "smallMutations": load_variant_records(get_test_file("small_mutations.short.tab")),
+                "copyVariants": load_variant_records(get_test_file("copy_variants.short.tab")),
+                "structuralVariants": load_variant_records(get_test_file("fusions.tab")),
                 "kbDiseaseMatch": "colorectal cancer",
-            },
-            allow_nan=False,
+            }
         )
     )
-    with patch.object(
-        sys,
-        "argv",
-        [
-            "ipr",
-            "--username",
-            os.environ.get("IPR_USER", os.environ["USER"]),
-            "--password",
-            os.environ["IPR_PASS"],
-            "--ipr_url",
-            "http://fake.url.ca",
-            "--graphkb_username",
-            os.environ.get("GRAPHKB_USER", os.environ["USER"]),
-            "--graphkb_password",
-            os.environ.get("GRAPHKB_PASS", os.environ["IPR_PASS"]),
-            "--graphkb_url",
-            os.environ.get("GRAPHKB_URL", False),
-            "--content",
-            str(json_file),
-            "--therapeutics",
-        ],
-    ):
-        with patch.object(IprConnection, "upload_report", new=mock):
-            with patch.object(IprConnection, "get_spec", return_value=get_test_spec()):
-                command_interface()
+    argv = [
+        "ipr",
+        "--username",
+        os.environ.get("IPR_USER", os.environ["USER"]),
+        "--password",
+        os.environ["IPR_PASS"],
+        "--ipr_url",
+        "http://fake.url.ca",
+        "--graphkb_username",
+        os.environ.get("GRAPHKB_USER", os.environ["USER"]),
+        "--graphkb_password",
+        os.environ.get("GRAPHKB_PASS", os.environ["IPR_PASS"]),
+        "--graphkb_url",
+        os.environ.get("GRAPHKB_URL", False),
+        "--content",
+        str(json_file),
+        "--therapeutics",
+    ]
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(sys, "argv", argv))
+        stack.enter_context(patch.object(IprConnection, "upload_report", new=mock))
+        stack.enter_context(patch.object(IprConnection, "get_spec", return_value=get_test_spec()))
+        command_interface()
 
     assert mock.called
 
@@ -99,6 +75,32 @@ def report_upload_content(tmp_path_factory) -> Dict:
     return report_content
 
 
+def test_clean_unsupported_content_trimmed_kb_match_ids() -> None:
+    content = clean_unsupported_content(
+        {
+            "genes": [],
+            "kbMatches": [
+                {"kbStatementId": "#1:1", "kbContextId": "#2:2", "kbRelevanceId": "#3:3"},
+                {"kbStatementId": "#1:2", "kbRelevanceId": "#3:3"},  # empty context trimmed
+            ],
+        }
+    )
+    assert content["kbMatches"] == [{"kbStatementId": "#1:1"}, {"kbStatementId": "#1:2"}]
+
+
+def test_command_interface_loads_nan_content(tmp_path) -> None:
+    content_file = tmp_path / "content.json"
+    content_file.write_text('{"patientId": "PATIENT001", "tumourContent": NaN}')
+    argv = ["ipr", "--username", "user", "--password", "pass", "--content", str(content_file)]
+    with patch.object(sys, "argv", argv), patch(
+        "pori_python.ipr.main.create_report"
+    ) as create_report:
+        command_interface()
+    content = create_report.call_args.kwargs["content"]
+    assert content["patientId"] == "PATIENT001"
+    assert math.isnan(content["tumourContent"])
+
+
 @pytest.mark.skipif(EXCLUDE_INTEGRATION_TESTS, reason="excluding long running integration tests")
 class TestCreateReport:
     def test_main_sections_present(self, report_upload_content: Dict) -> None:
@@ -115,7 +117,7 @@ class TestCreateReport:
             assert section in sections
 
     def test_kept_low_quality_fusion(self, report_upload_content: Dict) -> None:
-        fusions = [(sv["gene1"], sv["gene2"]) for sv in report_upload_content["structuralVariants"]]
+        fusions = {(sv["gene1"], sv["gene2"]) for sv in report_upload_content["structuralVariants"]}
         if (
             EXCLUDE_BCGSC_TESTS
         ):  # may be missing statements assoc with SUZ12 if no access to bcgsc data
@@ -130,25 +132,25 @@ class TestCreateReport:
     def test_found_fusion_partner_gene(self, report_upload_content: Dict) -> None:
         genes = report_upload_content["genes"]
         # eg, A1BG
-        assert any([g.get("knownFusionPartner", False) for g in genes])
+        assert any(g.get("knownFusionPartner", False) for g in genes)
 
     @pytest.mark.skipif(EXCLUDE_ONCOKB_TESTS, reason="excluding tests that depend on oncokb data")
     def test_found_oncogene(self, report_upload_content: Dict) -> None:
         genes = report_upload_content["genes"]
         # eg, ZBTB20
-        assert any([g.get("oncogene", False) for g in genes])
+        assert any(g.get("oncogene", False) for g in genes)
 
     @pytest.mark.skipif(EXCLUDE_ONCOKB_TESTS, reason="excluding tests that depend on oncokb data)")
     def test_found_tumour_supressor(self, report_upload_content: Dict) -> None:
         genes = report_upload_content["genes"]
         # eg, ZNRF3
-        assert any([g.get("tumourSuppressor", False) for g in genes])
+        assert any(g.get("tumourSuppressor", False) for g in genes)
 
     def test_found_kb_statement_related_gene(self, report_upload_content: Dict) -> None:
         genes = report_upload_content["genes"]
-        assert any([g.get("kbStatementRelated", False) for g in genes])
+        assert any(g.get("kbStatementRelated", False) for g in genes)
 
     @pytest.mark.skipif(EXCLUDE_ONCOKB_TESTS, reason="excluding tests that depend on oncokb data")
     def test_found_cancer_gene_list_match_gene(self, report_upload_content: Dict) -> None:
         genes = report_upload_content["genes"]
-        assert any([g.get("cancerGeneListMatch", False) for g in genes])
+        assert any(g.get("cancerGeneListMatch", False) for g in genes)
@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 import pytest
 from typing import Dict
 from unittest.mock import MagicMock, patch
@@ -8,6 +7,7 @@ from pori_python.ipr.connection import IprConnection
 from pori_python.ipr.main import create_report
 
 from .constants import EXCLUDE_INTEGRATION_TESTS
+from .util import load_variant_records
 
 EXCLUDE_BCGSC_TESTS = os.environ.get("EXCLUDE_BCGSC_TESTS") == "1"
 
@@ -18,6 +18,8 @@ def get_test_file(name: str) -> str:
 
 @pytest.fixture(scope="module")
 def probe_upload_content() -> Dict:
+    if EXCLUDE_INTEGRATION_TESTS:
+        pytest.skip("excluding long running integration tests")
     mock = MagicMock()
     with patch.object(IprConnection, "upload_report", new=mock):
         with patch.object(IprConnection, "get_spec", return_value={}):
@@ -25,14 +27,16 @@ def probe_upload_content() -> Dict:
                 content={
                     "patientId": "PATIENT001",
                     "project": "TEST",
-                    "smallMutations": pd.read_csv(
-                        get_test_file("small_mutations_probe.tab"),
-                        sep="\t",
-                        dtype={"chromosome": "string"},
-                    ).to_dict("records"),
-                    "structuralVariants": pd.read_csv(
-                        get_test_file("fusions.tab"), sep="\t"
-                    ).to_dict("records"),
+                    # the cached records are shared and create_report adds row keys to them
+                    "smallMutations": [
+                        dict(row)
+                        for row in load_variant_records(
+                            get_test_file("small_mutations_probe.tab"), ("chromosome",)
+                        )
+                    ],
+                    "structuralVariants": [
+                        dict(row) for row in load_variant_records(get_test_file("fusions.tab"))
+                    ],
                     "blargh": "some fake content",
                     "kbDiseaseMatch": "colorectal cancer",
                 },
@@ -61,12 +65,8 @@ class TestCreateReport:
     )
     def test_found_probe_small_mutations_match(self, probe_upload_content: Dict) -> None:
         # verify each probe had a KB match
+        matched_variants = {kb_match["variant"] for kb_match in probe_upload_content["kbMatches"]}
         for sm_probe in probe_upload_content["smallMutations"]:
-            match_list = [
-                kb_match
-                for kb_match in probe_upload_content["kbMatches"]
-                if kb_match["variant"] == sm_probe["key"]
-            ]
             assert (
-                match_list
+                sm_probe["key"] in matched_variants
             ), f"probe match failure: {sm_probe['gene']} {sm_probe['proteinChange']} key: {sm_probe['proteinChange']}"
@@ -1,8 +1,10 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from pori_python.ipr.summary import (
     GRAPHKB_GUI,
     get_preferred_drug_representation,
+    get_relevance_categories,
+    get_statements_by_rids,
     substitute_sentence_template,
 )
 
@@ -81,6 +83,42 @@ class TestGetPreferredDrugRepresentation:
         assert rec["sourceIdVersion"] == "1"
 
 
+class TestGetStatementsByRids:
+    def test_batches_unique_rids_in_order(self):
+        api = MagicMock(
+            query=MagicMock(
+                side_effect=[
+                    [{"@rid": "#1:2"}, {"@rid": "#1:1"}],
+                    [{"@rid": "#1:3"}],
+                ]
+            )
+        )
+        statements = get_statements_by_rids(api, ["#1:1", "#1:2", "#1:1", "#1:3"], batch_size=2)
+        assert [s["@rid"] for s in statements] == ["#1:1", "#1:2", "#1:3"]
+        assert [c.args[0] for c in api.query.call_args_list] == [
+            {"target": ["#1:1", "#1:2"], "neighbors": 1},
+            {"target": ["#1:3"], "neighbors": 1},
+        ]
+
+    def test_returns_copies_of_cached_records(self):
+        cached = [{"@rid": "#1:1", "subject": {"@rid": "#2:1"}}]
+        statements = get_statements_by_rids(
+            MagicMock(query=MagicMock(return_value=cached)), ["#1:1"]
+        )
+        statements[0]["subject"] = {"@rid": "#3:1"}
+        assert cached[0]["subject"] == {"@rid": "#2:1"}
+
+
+def test_get_relevance_categories_keeps_first_category():
+    with patch(
+        "pori_python.ipr.summary.get_terms_set",
+        side_effect=lambda conn, terms: {"#1:1", "#1:2"} if "no sensitivity" in terms else {"#1:1"},
+    ):
+        categories = get_relevance_categories(MagicMock())
+    assert categories["#1:1"] != "resistance"
+    assert categories["#1:2"] == "resistance"
+
+
 class TestSubstituteSentenceTemplate:
     def test_multiple_diseases_no_matches(self):
         template = "{conditions:variant} is associated with {relevance} to {subject} in {conditions:disease} ({evidence})"
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock, patch
+
+from pori_python.ipr.therapeutic_options import create_therapeutic_options
+
+VARIANTS = [
+    {"key": "1", "variantType": "cnv", "gene": "ERBB2", "cnvState": "amplification"},
+    {"key": "2", "variantType": "mut", "gene": "KRAS", "variant": "KRAS:p.G12D"},
+]
+
+
+def kb_match(variant, variant_type, drug, relevance="sensitivity", **kwargs):
+    match = {
+        "variant": variant,
+        "variantType": variant_type,
+        "category": "therapeutic",
+        "kbContextId": drug,
+        "kbRelevanceId": f"#{relevance}",
+        "relevance": relevance,
+        "kbVariantId": "#1:1",
+        "kbStatementId": "#2:1",
+        "evidenceLevel": "IPR-A",
+    }
+    match.update(kwargs)
+    return match
+
+
+def create_options(kb_matches):
+    with patch(
+        "pori_python.ipr.therapeutic_options.get_terms_set", return_value={"#resistance"}
+    ), patch(
+        "pori_python.ipr.therapeutic_options.get_preferred_drug_representation",
+        side_effect=lambda conn, rid: {"displayName": f"drug {rid}", "@rid": rid},
+    ):
+        return create_therapeutic_options(MagicMock(), kb_matches, VARIANTS)
+
+
+def test_create_therapeutic_options_groups_and_ranks():
+    options = create_options(
+        [
+            kb_match("2", "mut", "b", evidenceLevel="IPR-B"),
+            kb_match("1", "cnv", "a", relevance="resistance"),
+            kb_match("2", "mut", "b", evidenceLevel="IPR-A", relevance="response"),
+            kb_match("2", "mut", "b", evidenceLevel=""),
+            kb_match("1", "cnv", "a"),
+            kb_match("1", "cnv", "a", category="prognostic"),
+            kb_match("1", "cnv", "c", relevance="eligibility"),
+        ]
+    )
+    assert options == [
+        {
+            "gene": "ERBB2",
+            "type": "chemoresistance",
+            "therapy": "drug a",
+            "variant": "amplification",
+            "evidenceLevel": "IPR-A",
+            "context": "resistance",
+            "notes": "",
+            "rank": 0,
+        },
+        {
+            "gene": "ERBB2",
+            "type": "therapeutic",
+            "therapy": "drug a",
+            "variant": "amplification",
+            "evidenceLevel": "IPR-A",
+            "context": "sensitivity",
+            "notes": "",
+            "rank": 0,
+        },
+        {
+            "gene": "KRAS",
+            "type": "therapeutic",
+            "therapy": "drug b",
+            "variant": "p.G12D",
+            "evidenceLevel": "IPR-A / IPR-B",
+            "context": "response / sensitivity",
+            "notes": "",
+            "rank": 1,
+        },
+    ]
+
+
+def test_create_therapeutic_options_no_matches():
+    assert create_options([kb_match("1", "cnv", "a", category="prognostic")]) == []
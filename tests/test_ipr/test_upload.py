@@ -1,29 +1,35 @@
-import json
+import orjson
 import os
-import pandas as pd
 import pytest
 import sys
 import uuid
-from typing import Generator
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Dict, Generator
 from unittest.mock import patch
 
 from pori_python.ipr.connection import IprConnection
 from pori_python.ipr.main import command_interface
-from pori_python.types import IprGene
 
 from .constants import EXCLUDE_INTEGRATION_TESTS
+from .util import get_test_spec, load_variant_records
 
 EXCLUDE_BCGSC_TESTS = os.environ.get("EXCLUDE_BCGSC_TESTS") == "1"
 EXCLUDE_ONCOKB_TESTS = os.environ.get("EXCLUDE_ONCOKB_TESTS") == "1"
 INCLUDE_UPLOAD_TESTS = os.environ.get("INCLUDE_UPLOAD_TESTS", 0) == "1"
-
-
-def get_test_spec():
-    ipr_spec = {"components": {"schemas": {"genesCreate": {"properties": {}}}}}
-    ipr_gene_keys = IprGene.__required_keys__ | IprGene.__optional_keys__
-    for key in ipr_gene_keys:
-        ipr_spec["components"]["schemas"]["genesCreate"]["properties"][key] = ""
-    return ipr_spec
+PATIENT_ID_PLACEHOLDER = "__PATIENT_ID__"
+SECTION_FETCH_WORKERS = 8
+REPORT_SECTIONS = [
+    "expression-variants",
+    "structural-variants",
+    "small-mutations",
+    "copy-variants",
+    "kb-matches",
+    "therapeutic-targets",
+    "summary/genomic-alterations-identified",
+    "summary/analyst-comments",
+    "sample-info",
+]
 
 
 def get_test_file(name: str) -> str:
@@ -31,7 +37,16 @@ def get_test_file(name: str) -> str:
 
 
 @pytest.fixture(scope="module")
-def loaded_reports(tmp_path_factory) -> Generator:
+def ipr_conn() -> IprConnection:
+    return IprConnection(
+        username=os.environ.get("IPR_USER", os.environ["USER"]),
+        password=os.environ["IPR_PASS"],
+        url=os.environ["IPR_TEST_URL"],
+    )
+
+
+@pytest.fixture(scope="module")
+def loaded_reports(tmp_path_factory, ipr_conn: IprConnection) -> Generator:
     json_file = tmp_path_factory.mktemp("inputs") / "content.json"
     async_json_file = tmp_path_factory.mktemp("inputs") / "async_content.json"
     patient_id = f"TEST_{str(uuid.uuid4())}"
@@ -46,7 +61,7 @@ def loaded_reports(tmp_path_factory) -> Generator:
                 "name": "4",
             },
         ],
-        "patientId": patient_id,
+        "patientId": PATIENT_ID_PLACEHOLDER,
         "project": "TEST",
         "sampleInfo": [
             {
@@ -65,38 +80,17 @@ def loaded_reports(tmp_path_factory) -> Generator:
                 "collectionDate": "12-12-12",
             },
         ],
-        "expressionVariants": json.loads(
-            pd.read_csv(get_test_file("expression.short.tab"), sep="\t").to_json(orient="records")
-        ),
-        "smallMutations": json.loads(
-            pd.read_csv(get_test_file("small_mutations.short.tab"), sep="\t").to_json(
-                orient="records"
-            )
-        ),
-        "copyVariants": json.loads(
-            pd.read_csv(get_test_file("copy_variants.short.tab"), sep="\t").to_json(
-                orient="records"
-            )
-        ),
-        "structuralVariants": json.loads(
-            pd.read_csv(get_test_file("fusions.tab"), sep="\t").to_json(orient="records")
-        ),
+        "expressionVariants": load_variant_records(get_test_file("expression.short.tab")),
+        "smallMutations": load_variant_records(get_test_file("small_mutations.short.tab")),
+        "copyVariants": load_variant_records(get_test_file("copy_variants.short.tab")),
+        "structuralVariants": load_variant_records(get_test_file("fusions.tab")),
         "kbDiseaseMatch": "colorectal cancer",
     }
-    json_file.write_text(
-        json.dumps(
-            json_contents,
-            allow_nan=False,
-        )
-    )
-
-    json_contents["patientId"] = async_patient_id
-    async_json_file.write_text(
-        json.dumps(
-            json_contents,
-            allow_nan=False,
-        )
-    )
+    # serialize the variants once, the sync and async reports only differ by patientId
+    content = orjson.dumps(json_contents)
+    placeholder = orjson.dumps(PATIENT_ID_PLACEHOLDER)
+    json_file.write_bytes(content.replace(placeholder, orjson.dumps(patient_id), 1))
+    async_json_file.write_bytes(content.replace(placeholder, orjson.dumps(async_patient_id), 1))
 
     argslist = [
         "ipr",
@@ -115,23 +109,13 @@ def loaded_reports(tmp_path_factory) -> Generator:
         "--therapeutics",
     ]
 
-    sync_argslist = argslist.copy()
-    sync_argslist.extend(["--content", str(json_file)])
-    with patch.object(sys, "argv", sync_argslist):
-        with patch.object(IprConnection, "get_spec", return_value=get_test_spec()):
-            command_interface()
-
-    async_argslist = argslist.copy()
-    async_argslist.extend(["--content", str(async_json_file), "--async_upload"])
-    with patch.object(sys, "argv", async_argslist):
-        with patch.object(IprConnection, "get_spec", return_value=get_test_spec()):
-            command_interface()
+    sync_argslist = argslist + ["--content", str(json_file)]
+    async_argslist = argslist + ["--content", str(async_json_file), "--async_upload"]
+    with patch.object(IprConnection, "get_spec", return_value=get_test_spec()):
+        for report_argslist in (sync_argslist, async_argslist):
+            with patch.object(sys, "argv", report_argslist):
+                command_interface()
 
-    ipr_conn = IprConnection(
-        username=os.environ.get("IPR_USER", os.environ["USER"]),
-        password=os.environ["IPR_PASS"],
-        url=os.environ["IPR_TEST_URL"],
-    )
     loaded_report = ipr_conn.get(uri=f"reports?searchText={patient_id}")
     async_loaded_report = ipr_conn.get(uri=f"reports?searchText={async_patient_id}")
 
@@ -144,14 +128,21 @@ def loaded_reports(tmp_path_factory) -> Generator:
     ipr_conn.delete(uri=f"reports/{async_loaded_report['reports'][0]['ident']}")
 
 
-def get_section(loaded_report, section_name):
-    ident = loaded_report[1]["reports"][0]["ident"]
-    ipr_conn = IprConnection(
-        username=os.environ.get("IPR_USER", os.environ["USER"]),
-        password=os.environ["IPR_PASS"],
-        url=os.environ["IPR_TEST_URL"],
-    )
-    return ipr_conn.get(uri=f"reports/{ident}/{section_name}")
+@pytest.fixture(scope="module")
+def loaded_sections(ipr_conn: IprConnection, loaded_reports: Dict) -> Dict:
+    """Fetch every checked section of both reports concurrently"""
+    uris = {
+        (report_type, section_name): f"reports/{report[1]['reports'][0]['ident']}/{section_name}"
+        for report_type, report in loaded_reports.items()
+        for section_name in REPORT_SECTIONS
+    }
+    with ThreadPoolExecutor(max_workers=SECTION_FETCH_WORKERS) as executor:
+        sections = executor.map(lambda uri: ipr_conn.get(uri=uri), uris.values())
+        return dict(zip(uris, sections))
+
+
+def get_section(loaded_sections, report_type, section_name):
+    return loaded_sections[(report_type, section_name)]
 
 
 def compare_sections(section1, section2):
@@ -190,85 +181,78 @@ class TestCreateReport:
         assert loaded_reports["async"][1]["total"] == 1
         assert loaded_reports["async"][1]["reports"][0]["patientId"] == async_patient_id
 
-    def test_expression_variants_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "expression-variants")
-        kbmatched = [item for item in section if item["kbMatches"]]
-        assert "PTP4A3" in [item["gene"]["name"] for item in kbmatched]
-        async_section = get_section(loaded_reports["async"], "expression-variants")
-        assert compare_sections(section, async_section)
-
-    def test_structural_variants_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "structural-variants")
-        kbmatched = [item for item in section if item["kbMatches"]]
-        assert "(EWSR1,FLI1):fusion(e.7,e.4)" in [item["displayName"] for item in kbmatched]
-        async_section = get_section(loaded_reports["async"], "structural-variants")
-        assert compare_sections(section, async_section)
-
-    def test_small_mutations_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "small-mutations")
-        kbmatched = [item for item in section if item["kbMatches"]]
-        assert "FGFR2:p.R421C" in [item["displayName"] for item in kbmatched]
-        assert "CDKN2A:p.T18M" in [item["displayName"] for item in kbmatched]
-        async_section = get_section(loaded_reports["async"], "small-mutations")
-        assert compare_sections(section, async_section)
-
-    def test_copy_variants_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "copy-variants")
-        kbmatched = [item for item in section if item["kbMatches"]]
-        assert ("ERBB2", "amplification") in [
-            (item["gene"]["name"], item["displayName"]) for item in kbmatched
-        ]
-        async_section = get_section(loaded_reports["async"], "copy-variants")
-        assert compare_sections(section, async_section)
-
-    def test_kb_matches_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "kb-matches")
-        observed_and_matched = set(
-            [(item["kbVariant"], item["variant"]["displayName"]) for item in section]
-        )
-        for pair in [
-            ("ERBB2 amplification", "amplification"),
-            ("FGFR2 mutation", "FGFR2:p.R421C"),
-            ("PTP4A3 overexpression", "increased expression"),
-            ("EWSR1 and FLI1 fusion", "(EWSR1,FLI1):fusion(e.7,e.4)"),
-            ("CDKN2A mutation", "CDKN2A:p.T18M"),
-        ]:
-            assert pair in observed_and_matched
-        async_section = get_section(loaded_reports["async"], "kb-matches")
-        assert compare_sections(section, async_section)
-
-    def test_therapeutic_targets_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "therapeutic-targets")
-        therapeutic_target_genes = set([item["gene"] for item in section])
-        for gene in ["CDKN2A", "ERBB2", "FGFR2", "PTP4A3"]:
-            assert gene in therapeutic_target_genes
-        async_section = get_section(loaded_reports["async"], "therapeutic-targets")
-        assert compare_sections(section, async_section)
-
-    def test_genomic_alterations_identified_loaded(self, loaded_reports) -> None:
-        section = get_section(loaded_reports["sync"], "summary/genomic-alterations-identified")
-        variants = set([item["geneVariant"] for item in section])
-        for variant in [
-            "FGFR2:p.R421C",
-            "PTP4A3 (high_percentile)",
-            "ERBB2 (Amplification)",
-            "(EWSR1,FLI1):fusion(e.7,e.4)",
-            "CDKN2A:p.T18M",
-        ]:
-            assert variant in variants
-        async_section = get_section(
-            loaded_reports["async"], "summary/genomic-alterations-identified"
-        )
+    @pytest.mark.parametrize(
+        "section_name,kb_matched_only,key,expected",
+        [
+            ("expression-variants", True, lambda item: item["gene"]["name"], ["PTP4A3"]),
+            (
+                "structural-variants",
+                True,
+                itemgetter("displayName"),
+                ["(EWSR1,FLI1):fusion(e.7,e.4)"],
+            ),
+            (
+                "small-mutations",
+                True,
+                itemgetter("displayName"),
+                ["FGFR2:p.R421C", "CDKN2A:p.T18M"],
+            ),
+            (
+                "copy-variants",
+                True,
+                lambda item: (item["gene"]["name"], item["displayName"]),
+                [("ERBB2", "amplification")],
+            ),
+            (
+                "kb-matches",
+                False,
+                lambda item: (item["kbVariant"], item["variant"]["displayName"]),
+                [
+                    ("ERBB2 amplification", "amplification"),
+                    ("FGFR2 mutation", "FGFR2:p.R421C"),
+                    ("PTP4A3 overexpression", "increased expression"),
+                    ("EWSR1 and FLI1 fusion", "(EWSR1,FLI1):fusion(e.7,e.4)"),
+                    ("CDKN2A mutation", "CDKN2A:p.T18M"),
+                ],
+            ),
+            (
+                "therapeutic-targets",
+                False,
+                itemgetter("gene"),
+                ["CDKN2A", "ERBB2", "FGFR2", "PTP4A3"],
+            ),
+            (
+                "summary/genomic-alterations-identified",
+                False,
+                itemgetter("geneVariant"),
+                [
+                    "FGFR2:p.R421C",
+                    "PTP4A3 (high_percentile)",
+                    "ERBB2 (Amplification)",
+                    "(EWSR1,FLI1):fusion(e.7,e.4)",
+                    "CDKN2A:p.T18M",
+                ],
+            ),
+        ],
+    )
+    def test_section_loaded(
+        self, loaded_sections, section_name, kb_matched_only, key, expected
+    ) -> None:
+        section = get_section(loaded_sections, "sync", section_name)
+        observed = {key(item) for item in section if not kb_matched_only or item["kbMatches"]}
+        for value in expected:
+            assert value in observed
+        async_section = get_section(loaded_sections, "async", section_name)
         assert compare_sections(section, async_section)
 
-    def test_analyst_comments_loaded(self, loaded_reports) -> None:
-        sync_section = get_section(loaded_reports["sync"], "summary/analyst-comments")
+    def test_analyst_comments_loaded(self, loaded_sections) -> None:
+        sync_section = get_section(loaded_sections, "sync", "summary/analyst-comments")
         assert sync_section["comments"]
-        async_section = get_section(loaded_reports["async"], "summary/analyst-comments")
+        async_section = get_section(loaded_sections, "async", "summary/analyst-comments")
         assert async_section["comments"]
         assert sync_section["comments"] == async_section["comments"]
 
-    def test_sample_info_loaded(self, loaded_reports) -> None:
-        sync_section = get_section(loaded_reports["sync"], "sample-info")
-        async_section = get_section(loaded_reports["async"], "sample-info")
+    def test_sample_info_loaded(self, loaded_sections) -> None:
+        sync_section = get_section(loaded_sections, "sync", "sample-info")
+        async_section = get_section(loaded_sections, "async", "sample-info")
         assert compare_sections(sync_section, async_section)
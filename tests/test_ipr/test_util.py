@@ -1,6 +1,13 @@
+import numpy as np
+import orjson
 import pytest
 
-from pori_python.ipr.util import create_variant_name_tuple, trim_empty_values
+from pori_python.ipr.util import (
+    build_variant_index,
+    create_variant_name_tuple,
+    dumps_json,
+    trim_empty_values,
+)
 
 
 @pytest.mark.parametrize(
@@ -27,3 +34,17 @@ def test_create_variant_name_tuple(variant, result):
     gene, name = create_variant_name_tuple(variant)
     assert name == result
     assert gene == "GENE"
+
+
+def test_build_variant_index_keeps_first_variant():
+    first = {"key": "1", "variantType": "mut", "gene": "A"}
+    variants = [first, {"key": "1", "variantType": "mut", "gene": "B"}]
+    variants.append({"key": "1", "variantType": "cnv", "gene": "C"})
+    index = build_variant_index(variants)
+    assert index[("mut", "1")] is first
+    assert index[("cnv", "1")]["gene"] == "C"
+
+
+def test_dumps_json_accepts_numpy_values_and_non_string_keys():
+    content = {"rpkm": np.float64(6.14), "depth": np.int64(37), 1: np.bool_(True)}
+    assert orjson.loads(dumps_json(content)) == {"rpkm": 6.14, "depth": 37, "1": True}
@@ -1,3 +1,62 @@
+import csv
+import math
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from pori_python.types import IprGene
+
+IPR_GENE_KEYS = IprGene.__required_keys__ | IprGene.__optional_keys__
+
+
+def convert_column(values: List[str]) -> List:
+    """Cast a column of strings to int, float or bool when every non-blank value allows it
+
+    Blank and non-finite values become None, matching pandas' JSON export
+    """
+    for cast in (int, float):
+        try:
+            converted = [cast(value) if value else None for value in values]
+        except ValueError:
+            continue
+        return [
+            None if isinstance(value, float) and not math.isfinite(value) else value
+            for value in converted
+        ]
+    present = [value for value in values if value]
+    if present and all(value in ("True", "False") for value in present):
+        return [value == "True" if value else None for value in values]
+    return [value or None for value in values]
+
+
+def get_test_spec() -> Dict:
+    """Minimal IPR spec listing every IprGene field as a genesCreate property"""
+    properties = {key: "" for key in IPR_GENE_KEYS}
+    return {"components": {"schemas": {"genesCreate": {"properties": properties}}}}
+
+
+@lru_cache(maxsize=None)
+def load_variant_records(
+    path: str, str_columns: Tuple[str, ...] = ()
+) -> List[Dict[str, Optional[object]]]:
+    """Read a tab-delimited test file as a list of records, parsed once per session
+
+    Columns listed in str_columns are kept as text instead of cast. The records are shared
+    between callers and must not be modified
+    """
+    with open(path, newline="") as fh:
+        reader = csv.DictReader(fh, delimiter="\t")
+        rows = list(reader)
+        columns = {
+            col: (
+                [row.get(col) or None for row in rows]
+                if col in str_columns
+                else convert_column([row.get(col) or "" for row in rows])
+            )
+            for col in reader.fieldnames or []
+        }
+    return [{col: values[index] for col, values in columns.items()} for index in range(len(rows))]
+
+
 class QueryMock:
     def __init__(self, return_values) -> None:
         self.return_values = return_values